@@ -1,18 +1,18 @@
 import os
-import csv
+import math
+import heapq
 import logging
-from collections import Counter, defaultdict
 from flask import Flask, jsonify, request
 from flask_cors import CORS
 
 # Importar la lógica del proyecto anterior
 from modelo import Celular
-from estructuras.lista_doble import ListaDobleEnlazada
 from estructuras.pila import Pila
 from estructuras.cola import Cola
-from estructuras.arbol import ArbolBinarioBusqueda
-from estructuras.ordenamiento import bubble_sort_lista_doble, quick_sort_python_list
+from estructuras.ordenamiento import quick_sort_python_list
 from datos.generador_datos import generar_csv
+from sucursales import GestorSucursales, SUCURSAL_PRINCIPAL, TTL_RESERVA_SEGUNDOS, ESTADOS_EN_INVENTARIO
+from estadisticas import calcular_estadisticas
 
 # --- Configuración de Logging ---
 logging.basicConfig(level=logging.DEBUG, format='[%(asctime)s] [%(levelname)s] %(message)s')
@@ -22,165 +22,97 @@ app = Flask(__name__)
 CORS(app)  # Habilitar CORS para permitir peticiones desde el frontend
 
 # --- "Base de Datos" en Memoria ---
-inventario = ListaDobleEnlazada()
-historial_eliminados = Pila()
-cola_pedidos = Cola()
-indice_precios = ArbolBinarioBusqueda()
-ARCHIVO_DATOS = os.path.join("datos", "inventario.csv")
-
-SEGMENTOS_PRECIO = [
-    (0, 10000, "0 - 10K"),
-    (10000, 20000, "10K - 20K"),
-    (20000, 30000, "20K - 30K"),
-    (30000, float("inf"), "30K+")
+# Cada sucursal es un shard con su propia lista, BST, historial y CSV.
+# Las sucursales se configuran con ISTORE_SUCURSALES="principal,centro,norte".
+SUCURSALES = [
+    clave.strip() for clave in os.environ.get("ISTORE_SUCURSALES", SUCURSAL_PRINCIPAL).split(",")
+    if clave.strip()
 ]
-
-
-def _normalizar_condicion(valor):
-    if not valor:
-        return "Sin condición"
-    return valor
-
-
-def _normalizar_capacidad(valor):
-    if not valor:
-        return "Sin capacidad"
-    return valor
-
-
-def _normalizar_modelo(valor):
-    if not valor:
-        return "Modelo desconocido"
-    return valor
-
-
-def calcular_estadisticas():
-    inventario_list = inventario.convertir_a_lista_python()
-    vendidos_list = historial_eliminados.a_lista()
-
-    total_inventario = len(inventario_list)
-    valor_inventario = sum(c.precio for c in inventario_list)
-    promedio_precio = valor_inventario / total_inventario if total_inventario else 0
-    max_precio = max((c.precio for c in inventario_list), default=0)
-    min_precio = min((c.precio for c in inventario_list), default=0)
-
-    condition_counts = Counter(_normalizar_condicion(c.condicion) for c in inventario_list)
-    capacity_counts = Counter(_normalizar_capacidad(c.capacidad) for c in inventario_list)
-    inventory_top_models_counter = Counter(_normalizar_modelo(c.modelo) for c in inventario_list)
-
-    price_segments = []
-    for minimo, maximo, etiqueta in SEGMENTOS_PRECIO:
-        conteo = sum(1 for c in inventario_list if minimo <= c.precio < maximo)
-        price_segments.append({
-            "label": etiqueta,
-            "from": minimo,
-            "to": maximo if maximo != float("inf") else None,
-            "count": conteo
-        })
-
-    total_vendidos = len(vendidos_list)
-    ingresos = sum(c.precio for c in vendidos_list)
-    ticket_promedio = ingresos / total_vendidos if total_vendidos else 0
-
-    ventas_por_modelo = Counter(_normalizar_modelo(c.modelo) for c in vendidos_list)
-    ingresos_por_modelo = defaultdict(float)
-    for celular in vendidos_list:
-        ingresos_por_modelo[_normalizar_modelo(celular.modelo)] += celular.precio
-
-    top_modelos_vendidos = [
-        {
-            "modelo": modelo,
-            "cantidad": cantidad,
-            "ingresos": round(ingresos_por_modelo[modelo], 2)
-        }
-        for modelo, cantidad in ventas_por_modelo.most_common(5)
-    ]
-
-    top_modelos_inventario = [
-        {
-            "modelo": modelo,
-            "cantidad": cantidad
-        }
-        for modelo, cantidad in inventory_top_models_counter.most_common(5)
-    ]
-
-    estadisticas = {
-        "inventory": {
-            "total": total_inventario,
-            "available": total_inventario,  # Lista enlazada solo guarda disponibles
-            "value": round(valor_inventario, 2),
-            "average_price": round(promedio_precio, 2),
-            "max_price": round(max_precio, 2),
-            "min_price": round(min_precio, 2),
-            "condition_distribution": dict(condition_counts),
-            "capacity_distribution": dict(capacity_counts),
-            "price_segments": price_segments,
-            "top_models": top_modelos_inventario
-        },
-        "sales": {
-            "total": total_vendidos,
-            "revenue": round(ingresos, 2),
-            "average_ticket": round(ticket_promedio, 2),
-            "top_models": top_modelos_vendidos
-        }
-    }
-
-    return estadisticas
+# Duración de una reserva (segundos) si la petición no indica otra
+TTL_RESERVA = float(os.environ.get("ISTORE_RESERVA_TTL", TTL_RESERVA_SEGUNDOS))
+sucursales = GestorSucursales(SUCURSALES, ttl_reserva=TTL_RESERVA)
+historial_acciones = Pila()  # Claves de sucursal en orden de venta, para deshacer globalmente
+cola_pedidos = Cola()
 
 # --- Funciones de Carga y Guardado ---
 def cargar_datos():
-    """Carga los datos del CSV a las estructuras en memoria."""
-    global inventario, indice_precios
-    # Limpiar estructuras antes de cargar
-    inventario = ListaDobleEnlazada()
-    indice_precios = ArbolBinarioBusqueda()
-    
+    """Carga el CSV de cada sucursal a sus propias estructuras en memoria."""
     try:
-        with open(ARCHIVO_DATOS, mode='r', encoding='utf-8') as file:
-            reader = csv.reader(file)
-            next(reader)  # Saltar cabecera
-            for row in reader:
-                if row:
-                    c = Celular(row[0], row[1], row[2], row[3], row[4], row[5])
-                    if c.estado == "Disponible":
-                        inventario.agregar_al_final(c)
-                        indice_precios.insertar(c)
-        logging.info(f"Carga exitosa. {inventario.tamano} equipos disponibles en memoria.")
-    except FileNotFoundError:
-        logging.warning("Archivo de datos no encontrado. Se generará uno nuevo.")
-        generar_csv(50)
-        if os.path.exists("inventario.csv"):
-            os.replace("inventario.csv", ARCHIVO_DATOS)
-        cargar_datos() # Volver a intentar la carga
+        # Crear primero los archivos faltantes para que la carga vea todos los IDs
+        for clave, sucursal in sucursales.sucursales.items():
+            if os.path.exists(sucursal.archivo):
+                continue
+            if clave == SUCURSAL_PRINCIPAL:
+                logging.warning("Archivo de datos no encontrado. Se generará uno nuevo.")
+                generar_csv(50)
+                if os.path.exists("inventario.csv"):
+                    os.replace("inventario.csv", sucursal.archivo)
+            else:
+                logging.warning(f"Sucursal '{clave}' sin archivo de datos. Se creará vacía.")
+                sucursal.guardar()
+        resultados = sucursales.cargar()
+        total = sum(s.inventario.tamano for s in sucursales.sucursales.values())
+        logging.info(f"Carga exitosa. {total} equipos disponibles en memoria ({len(resultados)} sucursales).")
     except Exception as e:
         logging.error(f"Error crítico cargando datos: {e}")
 
-def guardar_datos():
-    """Guarda el estado actual del inventario y vendidos en el CSV."""
-    # Esta función es más compleja en un entorno real.
-    # Por simplicidad, reescribiremos el archivo.
-    logging.info("Iniciando guardado de datos en CSV...")
-    todos_los_celulares = inventario.convertir_a_lista_python()
-    
-    # Podríamos añadir aquí los vendidos que están en la pila, etc.
-    
+def guardar_datos(sucursal):
+    """Guarda el inventario de una sucursal en su propio CSV."""
+    # Solo se reescribe el archivo del shard que cambió.
+    logging.info(f"Iniciando guardado de datos de la sucursal '{sucursal.clave}'...")
+    sucursal.guardar()
+
+
+def _sucursales_solicitadas():
+    """Lee ?sucursal=a,b de la petición. None significa todas las sucursales."""
+    valor = request.args.get('sucursal')
+    if not valor:
+        return None, None
+    claves = [clave.strip() for clave in valor.split(",") if clave.strip()]
+    desconocidas = [clave for clave in claves if sucursales.obtener(clave) is None]
+    if desconocidas:
+        return None, (jsonify({"error": f"Sucursal no encontrada: {', '.join(desconocidas)}"}), 404)
+    return claves, None
+
+
+def _leer_ttl(data):
+    """TTL opcional de la petición (ttl_seconds). Devuelve (ttl, error)."""
+    if data.get('ttl_seconds') is None:
+        return None, None
     try:
-        with open(ARCHIVO_DATOS, mode='w', newline='', encoding='utf-8') as file:
-            writer = csv.writer(file)
-            writer.writerow(["ID", "Modelo", "Capacidad", "Condicion", "Precio", "Estado"])
-            for celular in todos_los_celulares:
-                writer.writerow(celular.to_csv_row())
-        logging.info("Datos guardados correctamente en " + ARCHIVO_DATOS)
-    except Exception as e:
-        logging.error(f"Error guardando datos: {e}")
+        ttl = float(data['ttl_seconds'])
+    except (TypeError, ValueError):
+        return None, (jsonify({"error": "ttl_seconds debe ser numérico"}), 400)
+    if not math.isfinite(ttl) or ttl <= 0:
+        return None, (jsonify({"error": "ttl_seconds debe ser un número finito mayor a 0"}), 400)
+    return ttl, None
+
+
+@app.before_request
+def expirar_reservas():
+    """Avanza la rueda de reservas antes de atender cada petición.
+
+    Solo se revisan las ranuras de los ticks transcurridos, no todo el inventario.
+    """
+    for sucursal in sucursales.expirar_reservas():
+        guardar_datos(sucursal)
 
 
 # --- Endpoints de la API ---
 
+@app.route('/api/branches', methods=['GET'])
+def get_branches():
+    """Devuelve las sucursales configuradas y cuántos equipos tiene cada una."""
+    conteos = sucursales.repartir(lambda s: s.inventario.tamano)
+    return jsonify([{"sucursal": clave, "total": total} for clave, total in conteos.items()])
+
 @app.route('/api/inventory', methods=['GET'])
 def get_inventory():
-    """Devuelve todo el inventario disponible."""
-    lista_py = inventario.convertir_a_lista_python()
+    """Devuelve el inventario disponible (todas las sucursales o ?sucursal=)."""
+    claves, error = _sucursales_solicitadas()
+    if error:
+        return error
+    lista_py = sucursales.listar(claves)
     # Convertir objetos a diccionarios para que sean serializables a JSON
     inventario_json = [c.__dict__ for c in lista_py]
     logging.debug(f"GET /api/inventory - Devolviendo {len(inventario_json)} items.")
@@ -188,13 +120,19 @@ def get_inventory():
 
 @app.route('/api/inventory', methods=['POST'])
 def add_inventory_item():
-    """Agrega un nuevo celular al inventario."""
+    """Agrega un nuevo celular al inventario de una sucursal."""
     data = request.json
     logging.debug(f"POST /api/inventory - Recibido: {data}")
-    
+
+    clave = data.get('sucursal') or request.args.get('sucursal') or SUCURSAL_PRINCIPAL
+    sucursal = sucursales.obtener(clave)
+    if sucursal is None:
+        logging.warning(f"Intento de agregar a la sucursal desconocida '{clave}'.")
+        return jsonify({"error": f"Sucursal no encontrada: {clave}"}), 404
+
     # En un sistema real, el ID sería autoincremental o un UUID.
-    # Aquí usamos el tamaño actual + 1 como ID simple.
-    new_id = inventario.tamano + 1 
+    # Aquí usamos un contador global a todas las sucursales.
+    new_id = sucursales.asignar_id()
     
     try:
         nuevo_celular = Celular(
@@ -204,10 +142,9 @@ def add_inventory_item():
             condicion=data['condicion'],
             precio=data['precio']
         )
-        inventario.agregar_al_final(nuevo_celular)
-        indice_precios.insertar(nuevo_celular)
-        guardar_datos() # Persistir cambio
-        logging.info(f"Nuevo celular agregado: {nuevo_celular}")
+        sucursal.agregar(nuevo_celular)
+        guardar_datos(sucursal) # Persistir cambio
+        logging.info(f"Nuevo celular agregado en '{clave}': {nuevo_celular}")
         return jsonify(nuevo_celular.__dict__), 201
     except KeyError as e:
         logging.error(f"Falta el campo {e} en la petición.")
@@ -219,24 +156,37 @@ def update_inventory_item(item_id):
     data = request.json
     logging.debug(f"PUT /api/inventory/{item_id} - Recibido: {data}")
     
-    # Buscar el nodo en la lista
-    actual = inventario.cabeza
-    celular_encontrado = None
-    while actual:
-        if actual.dato.id == item_id:
-            celular_encontrado = actual.dato
-            break
-        actual = actual.siguiente
+    claves, error = _sucursales_solicitadas()
+    if error:
+        return error
+    # Buscar el equipo en todas las sucursales (o solo en ?sucursal=)
+    sucursal, celular_encontrado = sucursales.buscar_por_id(item_id, claves)
         
     if celular_encontrado:
+        # Validar todo antes de modificar el equipo, para no dejar cambios a medias
+        if 'precio' in data:
+            try:
+                float(data['precio'])
+            except (TypeError, ValueError):
+                return jsonify({"error": "El precio debe ser numérico"}), 400
+        cambia_estado = 'estado' in data and data['estado'] != celular_encontrado.estado
+        reservando = cambia_estado and data['estado'] == "Reservado"
+        if reservando:
+            ttl, error = _leer_ttl(data)
+            if error:
+                return error
+            if celular_encontrado.estado not in ESTADOS_EN_INVENTARIO \
+                    or not sucursales.reservar(sucursal, item_id, ttl):
+                logging.warning(f"Intento de reservar ID {item_id} que no está disponible.")
+                return jsonify({"error": "Item no disponible para reservar"}), 409
+
         # Actualizar campos
-        if 'modelo' in data: celular_encontrado.modelo = data['modelo']
-        if 'capacidad' in data: celular_encontrado.capacidad = data['capacidad']
-        if 'condicion' in data: celular_encontrado.condicion = data['condicion']
-        if 'precio' in data: celular_encontrado.precio = data['precio']
-        if 'estado' in data: celular_encontrado.estado = data['estado']
+        sucursal.actualizar(item_id, data)
+        if cambia_estado and not reservando:
+            sucursales.cancelar_reserva(sucursal, item_id)
+            sucursal.cambiar_estado(item_id, data['estado'])
         
-        guardar_datos()
+        guardar_datos(sucursal)
         logging.info(f"Celular ID {item_id} actualizado.")
         return jsonify(celular_encontrado.__dict__)
     else:
@@ -248,29 +198,75 @@ def sell_item(item_id):
     """Vende (elimina) un celular del inventario."""
     logging.debug(f"DELETE /api/inventory/{item_id}")
     
-    celular_vendido = inventario.eliminar_por_id(item_id)
+    claves, error = _sucursales_solicitadas()
+    if error:
+        return error
+    sucursal, _ = sucursales.buscar_por_id(item_id, claves)
+    celular_vendido = sucursales.vender(sucursal, item_id) if sucursal else None
     
     if celular_vendido:
-        celular_vendido.estado = "Vendido"
-        historial_eliminados.push(celular_vendido)
-        guardar_datos() # Persistir cambio
-        logging.info(f"Celular ID {item_id} vendido y movido al historial.")
+        historial_acciones.push(sucursal.clave)
+        guardar_datos(sucursal) # Persistir cambio
+        logging.info(f"Celular ID {item_id} vendido en '{sucursal.clave}' y movido al historial.")
         return jsonify(celular_vendido.__dict__)
     else:
         logging.warning(f"Intento de eliminar ID {item_id} no encontrado.")
         return jsonify({"error": "Item no encontrado"}), 404
 
+@app.route('/api/inventory/<int:item_id>/reservation', methods=['POST'])
+def reserve_item(item_id):
+    """Aparta un celular por un tiempo limitado (ttl_seconds opcional)."""
+    data = request.get_json(silent=True) or {}
+    logging.debug(f"POST /api/inventory/{item_id}/reservation - Recibido: {data}")
+    ttl, error = _leer_ttl(data)
+    if error:
+        return error
+
+    claves, error = _sucursales_solicitadas()
+    if error:
+        return error
+    sucursal, _ = sucursales.buscar_por_id(item_id, claves)
+    celular_reservado = sucursales.reservar(sucursal, item_id, ttl) if sucursal else None
+
+    if celular_reservado:
+        guardar_datos(sucursal)
+        logging.info(f"Celular ID {item_id} reservado hasta {celular_reservado.reservado_hasta}.")
+        return jsonify(celular_reservado.__dict__)
+    elif sucursal:
+        logging.warning(f"Intento de reservar ID {item_id} que no está disponible.")
+        return jsonify({"error": "Item no disponible para reservar"}), 409
+    else:
+        logging.warning(f"Intento de reservar ID {item_id} no encontrado.")
+        return jsonify({"error": "Item no encontrado"}), 404
+
+@app.route('/api/inventory/<int:item_id>/reservation', methods=['DELETE'])
+def release_item(item_id):
+    """Cancela la reserva de un celular y lo regresa a Disponible."""
+    logging.debug(f"DELETE /api/inventory/{item_id}/reservation")
+
+    claves, error = _sucursales_solicitadas()
+    if error:
+        return error
+    sucursal, _ = sucursales.buscar_por_id(item_id, claves)
+    celular_liberado = sucursales.cancelar_reserva(sucursal, item_id) if sucursal else None
+
+    if celular_liberado:
+        guardar_datos(sucursal)
+        logging.info(f"Reserva del celular ID {item_id} cancelada.")
+        return jsonify(celular_liberado.__dict__)
+    else:
+        logging.warning(f"Intento de liberar ID {item_id} sin reserva.")
+        return jsonify({"error": "Item no encontrado o sin reserva"}), 404
+
 @app.route('/api/undo', methods=['POST'])
 def undo_last_sale():
-    """Deshace la última venta/eliminación."""
+    """Deshace la última venta/eliminación (de cualquier sucursal)."""
     logging.debug("POST /api/undo")
-    celular_recuperado = historial_eliminados.pop()
+    clave = historial_acciones.pop()
+    celular_recuperado = sucursales.obtener(clave).deshacer_venta() if clave else None
     
     if celular_recuperado:
-        celular_recuperado.estado = "Disponible"
-        inventario.agregar_al_final(celular_recuperado)
-        indice_precios.insertar(celular_recuperado) # Re-indexar
-        guardar_datos()
+        guardar_datos(sucursales.obtener(clave))
         logging.info(f"Acción deshecha. Recuperado: {celular_recuperado}")
         return jsonify(celular_recuperado.__dict__)
     else:
@@ -281,26 +277,49 @@ def undo_last_sale():
 def get_sorted_inventory():
     """Devuelve el inventario ordenado usando algoritmos específicos."""
     algo = request.args.get('algorithm', 'quick') # 'bubble' or 'quick'
+    claves, error = _sucursales_solicitadas()
+    if error:
+        return error
     
     if algo == 'bubble':
-        # Ordenar la lista enlazada in-place por precio
-        # Nota: Esto modifica el orden interno de la lista en memoria
-        bubble_sort_lista_doble(inventario)
-        lista_py = inventario.convertir_a_lista_python()
+        # Cada sucursal ordena su lista enlazada in-place por precio
+        # Nota: Esto modifica el orden interno de las listas en memoria
+        parciales = sucursales.repartir(lambda s: s.ordenar_por_precio(), claves)
+        lista_py = list(heapq.merge(*parciales.values(), key=lambda c: c.precio))
         logging.info("Inventario ordenado por Precio usando Bubble Sort.")
     else:
-        # Ordenar usando Quick Sort (por modelo) sin modificar la lista enlazada original
-        lista_base = inventario.convertir_a_lista_python()
+        # Ordenar usando Quick Sort (por modelo) sin modificar las listas enlazadas originales
+        lista_base = sucursales.listar(claves)
         lista_py = quick_sort_python_list(lista_base)
         logging.info("Inventario ordenado por Modelo usando Quick Sort.")
         
     return jsonify([c.__dict__ for c in lista_py])
 
+@app.route('/api/inventory/search', methods=['GET'])
+def search_inventory():
+    """Busca en todas las sucursales por rango de precio (BST) y/o texto (?q=)."""
+    claves, error = _sucursales_solicitadas()
+    if error:
+        return error
+    texto = request.args.get('q', '').strip()
+    try:
+        min_precio = float(request.args.get('min', 0))
+        max_precio = float(request.args.get('max', float("inf")))
+    except ValueError:
+        return jsonify({"error": "Los parámetros min y max deben ser numéricos"}), 400
+
+    resultados = sucursales.buscar_por_rango_precio(min_precio, max_precio, texto, claves)
+    logging.debug(f"GET /api/inventory/search - {len(resultados)} resultados.")
+    return jsonify([c.__dict__ for c in resultados])
+
 
 @app.route('/api/stats', methods=['GET'])
 def get_stats():
-    """Devuelve métricas agregadas de inventario y ventas."""
-    stats_payload = calcular_estadisticas()
+    """Devuelve métricas agregadas de inventario y ventas (todas las sucursales o ?sucursal=)."""
+    claves, error = _sucursales_solicitadas()
+    if error:
+        return error
+    stats_payload = calcular_estadisticas(sucursales, claves)
     logging.debug("GET /api/stats - Enviando estadísticas resumidas")
     return jsonify(stats_payload)
 
@@ -20,7 +20,7 @@ def generar_csv(cantidad=50):
     ruta_archivo = "inventario.csv"
     with open(ruta_archivo, mode='w', newline='', encoding='utf-8') as file:
         writer = csv.writer(file)
-        writer.writerow(["ID", "Modelo", "Capacidad", "Condicion", "Precio", "Estado"])
+        writer.writerow(["ID", "Modelo", "Capacidad", "Condicion", "Precio", "Estado", "ReservadoHasta"])
         
         for i in range(1, cantidad + 1):
             modelo, precio_base = random.choice(MODELOS)
@@ -39,7 +39,7 @@ def generar_csv(cantidad=50):
             
             estado = "Disponible" # Inicialmente todos disponibles
             
-            writer.writerow([i, modelo, capacidad, condicion, round(precio, 2), estado])
+            writer.writerow([i, modelo, capacidad, condicion, round(precio, 2), estado, ""])
     
     print(f"Archivo {ruta_archivo} generado con {cantidad} registros.")
 
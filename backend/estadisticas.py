@@ -0,0 +1,148 @@
+from collections import Counter, defaultdict
+
+SEGMENTOS_PRECIO = [
+    (0, 10000, "0 - 10K"),
+    (10000, 20000, "10K - 20K"),
+    (20000, 30000, "20K - 30K"),
+    (30000, float("inf"), "30K+")
+]
+
+
+def _normalizar_condicion(valor):
+    if not valor:
+        return "Sin condición"
+    return valor
+
+
+def _normalizar_capacidad(valor):
+    if not valor:
+        return "Sin capacidad"
+    return valor
+
+
+def _normalizar_modelo(valor):
+    if not valor:
+        return "Modelo desconocido"
+    return valor
+
+
+def _resumen_sucursal(sucursal):
+    """Agregados parciales de una sucursal; Sucursal.resumen los cachea hasta el siguiente cambio."""
+    inventario_list = sucursal.listar()
+    vendidos_list = sucursal.vendidos()
+
+    ingresos_por_modelo = defaultdict(float)
+    for celular in vendidos_list:
+        ingresos_por_modelo[_normalizar_modelo(celular.modelo)] += celular.precio
+
+    return {
+        "total": len(inventario_list),
+        "disponibles": sum(1 for c in inventario_list if c.estado == "Disponible"),
+        "reservados": sum(1 for c in inventario_list if c.estado == "Reservado"),
+        "valor": sum(c.precio for c in inventario_list),
+        "max_precio": max((c.precio for c in inventario_list), default=None),
+        "min_precio": min((c.precio for c in inventario_list), default=None),
+        "condiciones": Counter(_normalizar_condicion(c.condicion) for c in inventario_list),
+        "capacidades": Counter(_normalizar_capacidad(c.capacidad) for c in inventario_list),
+        "modelos": Counter(_normalizar_modelo(c.modelo) for c in inventario_list),
+        "segmentos": [
+            sum(1 for c in inventario_list if minimo <= c.precio < maximo)
+            for minimo, maximo, _ in SEGMENTOS_PRECIO
+        ],
+        "vendidos": len(vendidos_list),
+        "ingresos": sum(c.precio for c in vendidos_list),
+        "ventas_por_modelo": Counter(_normalizar_modelo(c.modelo) for c in vendidos_list),
+        "ingresos_por_modelo": ingresos_por_modelo
+    }
+
+
+def calcular_estadisticas(sucursales, claves=None):
+    """Combina los resúmenes de las sucursales seleccionadas (todas si claves es None)."""
+    parciales = sucursales.repartir(lambda s: s.resumen(_resumen_sucursal), claves)
+    resumenes = list(parciales.values())
+
+    total_inventario = sum(r["total"] for r in resumenes)
+    total_disponibles = sum(r["disponibles"] for r in resumenes)
+    total_reservados = sum(r["reservados"] for r in resumenes)
+    valor_inventario = sum(r["valor"] for r in resumenes)
+    promedio_precio = valor_inventario / total_inventario if total_inventario else 0
+    max_precio = max((r["max_precio"] for r in resumenes if r["max_precio"] is not None), default=0)
+    min_precio = min((r["min_precio"] for r in resumenes if r["min_precio"] is not None), default=0)
+
+    condition_counts = Counter()
+    capacity_counts = Counter()
+    inventory_top_models_counter = Counter()
+    ventas_por_modelo = Counter()
+    ingresos_por_modelo = defaultdict(float)
+    for r in resumenes:
+        condition_counts.update(r["condiciones"])
+        capacity_counts.update(r["capacidades"])
+        inventory_top_models_counter.update(r["modelos"])
+        ventas_por_modelo.update(r["ventas_por_modelo"])
+        for modelo, ingreso in r["ingresos_por_modelo"].items():
+            ingresos_por_modelo[modelo] += ingreso
+
+    price_segments = []
+    for i, (minimo, maximo, etiqueta) in enumerate(SEGMENTOS_PRECIO):
+        price_segments.append({
+            "label": etiqueta,
+            "from": minimo,
+            "to": maximo if maximo != float("inf") else None,
+            "count": sum(r["segmentos"][i] for r in resumenes)
+        })
+
+    total_vendidos = sum(r["vendidos"] for r in resumenes)
+    ingresos = sum(r["ingresos"] for r in resumenes)
+    ticket_promedio = ingresos / total_vendidos if total_vendidos else 0
+
+    top_modelos_vendidos = [
+        {
+            "modelo": modelo,
+            "cantidad": cantidad,
+            "ingresos": round(ingresos_por_modelo[modelo], 2)
+        }
+        for modelo, cantidad in ventas_por_modelo.most_common(5)
+    ]
+
+    top_modelos_inventario = [
+        {
+            "modelo": modelo,
+            "cantidad": cantidad
+        }
+        for modelo, cantidad in inventory_top_models_counter.most_common(5)
+    ]
+
+    estadisticas = {
+        "inventory": {
+            "total": total_inventario,
+            "available": total_disponibles,  # Los equipos reservados no cuentan como disponibles
+            "reserved": total_reservados,
+            "value": round(valor_inventario, 2),
+            "average_price": round(promedio_precio, 2),
+            "max_price": round(max_precio, 2),
+            "min_price": round(min_precio, 2),
+            "condition_distribution": dict(condition_counts),
+            "capacity_distribution": dict(capacity_counts),
+            "price_segments": price_segments,
+            "top_models": top_modelos_inventario
+        },
+        "sales": {
+            "total": total_vendidos,
+            "revenue": round(ingresos, 2),
+            "average_ticket": round(ticket_promedio, 2),
+            "top_models": top_modelos_vendidos
+        },
+        "branches": {
+            clave: {
+                "total": r["total"],
+                "available": r["disponibles"],
+                "reserved": r["reservados"],
+                "value": round(r["valor"], 2),
+                "sales": r["vendidos"],
+                "revenue": round(r["ingresos"], 2)
+            }
+            for clave, r in parciales.items()
+        }
+    }
+
+    return estadisticas
@@ -0,0 +1,63 @@
+import math
+import threading
+import time
+
+
+class RuedaTemporizadores:
+    """Hashed Timing Wheel para vencimientos (reservas con TTL).
+
+    El tiempo se divide en ticks de `resolucion` segundos y cada tick cae en una
+    ranura (tick % numero de ranuras). Programar y cancelar son O(1); avanzar un
+    tick solo revisa su ranura en lugar de recorrer todos los temporizadores.
+    """
+    def __init__(self, ranuras=1024, resolucion=1.0, inicio=None):
+        self.resolucion = resolucion
+        self.ranuras = [{} for _ in range(ranuras)]  # clave -> tick de vencimiento
+        self.ubicacion = {}  # clave -> índice de ranura, para cancelar en O(1)
+        self.tick_actual = self._tick(time.time() if inicio is None else inicio)
+        self.candado = threading.Lock()
+
+    def __len__(self):
+        return len(self.ubicacion)
+
+    def _tick(self, instante):
+        return int(instante // self.resolucion)
+
+    def programar(self, clave, vence_en):
+        """Programa (o reprograma) `clave` para vencer en el instante `vence_en`."""
+        with self.candado:
+            self._cancelar(clave)
+            # Se redondea hacia arriba para nunca vencer antes de tiempo;
+            # un vencimiento ya pasado se atiende en el siguiente tick
+            tick = max(math.ceil(vence_en / self.resolucion), self.tick_actual + 1)
+            indice = tick % len(self.ranuras)
+            self.ranuras[indice][clave] = tick
+            self.ubicacion[clave] = indice
+
+    def cancelar(self, clave):
+        with self.candado:
+            return self._cancelar(clave)
+
+    def _cancelar(self, clave):
+        indice = self.ubicacion.pop(clave, None)
+        if indice is None:
+            return False
+        del self.ranuras[indice][clave]
+        return True
+
+    def avanzar(self, ahora=None):
+        """Avanza la rueda hasta `ahora` y devuelve las claves vencidas."""
+        objetivo = self._tick(time.time() if ahora is None else ahora)
+        vencidas = []
+        with self.candado:
+            # Tras una vuelta completa ya se visitaron todas las ranuras
+            desde = max(self.tick_actual + 1, objetivo - len(self.ranuras) + 1)
+            for tick in range(desde, objetivo + 1):
+                ranura = self.ranuras[tick % len(self.ranuras)]
+                # Las claves de vueltas futuras comparten ranura y se quedan
+                for clave in [c for c, vence in ranura.items() if vence <= objetivo]:
+                    del ranura[clave]
+                    del self.ubicacion[clave]
+                    vencidas.append(clave)
+            self.tick_actual = max(self.tick_actual, objetivo)
+        return vencidas
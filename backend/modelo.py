@@ -1,14 +1,17 @@
 class Celular:
-    def __init__(self, id, modelo, capacidad, condicion, precio, estado="Disponible"):
+    def __init__(self, id, modelo, capacidad, condicion, precio, estado="Disponible", sucursal=None, reservado_hasta=None):
         self.id = int(id)
         self.modelo = modelo
         self.capacidad = capacidad
         self.condicion = condicion
         self.precio = float(precio)
         self.estado = estado
+        self.sucursal = sucursal
+        # Instante (epoch) en que vence la reserva; solo aplica con estado "Reservado"
+        self.reservado_hasta = float(reservado_hasta) if reservado_hasta else None
 
     def __str__(self):
         return f"[{self.id}] {self.modelo} ({self.capacidad}) - {self.condicion} - ${self.precio:.2f} [{self.estado}]"
     
     def to_csv_row(self):
-        return [self.id, self.modelo, self.capacidad, self.condicion, self.precio, self.estado]
+        return [self.id, self.modelo, self.capacidad, self.condicion, self.precio, self.estado, self.reservado_hasta or ""]
@@ -0,0 +1,370 @@
+import os
+import csv
+import heapq
+import math
+import logging
+import threading
+import time
+
+from modelo import Celular
+from estructuras.lista_doble import ListaDobleEnlazada
+from estructuras.pila import Pila
+from estructuras.arbol import ArbolBinarioBusqueda
+from estructuras.ordenamiento import bubble_sort_lista_doble
+from estructuras.rueda_temporizadores import RuedaTemporizadores
+
+SUCURSAL_PRINCIPAL = "principal"
+DIRECTORIO_DATOS = "datos"
+CABECERA_CSV = ["ID", "Modelo", "Capacidad", "Condicion", "Precio", "Estado", "ReservadoHasta"]
+ESTADOS_EN_INVENTARIO = ("Disponible", "Reservado")
+TTL_RESERVA_SEGUNDOS = 15 * 60
+
+
+def ruta_archivo_sucursal(clave):
+    """La sucursal principal conserva el archivo original para no romper instalaciones previas."""
+    if clave == SUCURSAL_PRINCIPAL:
+        return os.path.join(DIRECTORIO_DATOS, "inventario.csv")
+    return os.path.join(DIRECTORIO_DATOS, f"inventario_{clave}.csv")
+
+
+class Sucursal:
+    """Shard del inventario: cada sucursal tiene sus propias estructuras y su propio CSV."""
+    def __init__(self, clave, archivo=None):
+        self.clave = clave
+        self.archivo = archivo or ruta_archivo_sucursal(clave)
+        self.inventario = ListaDobleEnlazada()
+        self.indice_precios = ArbolBinarioBusqueda()
+        self.historial_eliminados = Pila()
+        # Flask atiende peticiones en varios hilos que pueden tocar la misma sucursal
+        self.candado = threading.RLock()
+        # Cada cambio incrementa la versión e invalida el resumen cacheado
+        self.version = 0
+        self._resumen = None
+        self._resumen_version = None
+
+    def _cambio(self):
+        self.version += 1
+
+    def resumen(self, calcular):
+        """Agregados parciales de la sucursal; solo se recalculan si hubo cambios."""
+        with self.candado:
+            if self._resumen_version != self.version:
+                self._resumen = calcular(self)
+                self._resumen_version = self.version
+            return self._resumen
+
+    def cargar(self):
+        """Carga el CSV de la sucursal. Devuelve False si el archivo no existe."""
+        with self.candado:
+            self.inventario = ListaDobleEnlazada()
+            self.indice_precios = ArbolBinarioBusqueda()
+            if not os.path.exists(self.archivo):
+                return False
+            with open(self.archivo, mode='r', encoding='utf-8') as file:
+                reader = csv.reader(file)
+                next(reader, None)  # Saltar cabecera
+                for row in reader:
+                    if row:
+                        # Los CSV anteriores no tienen la columna ReservadoHasta
+                        reservado_hasta = row[6] if len(row) > 6 else None
+                        c = Celular(row[0], row[1], row[2], row[3], row[4], row[5],
+                                    sucursal=self.clave, reservado_hasta=reservado_hasta)
+                        if c.estado in ESTADOS_EN_INVENTARIO:
+                            self.inventario.agregar_al_final(c)
+            self._reindexar()
+            self._cambio()
+            logging.info(f"Sucursal '{self.clave}': {self.inventario.tamano} equipos disponibles en memoria.")
+            return True
+
+    def guardar(self):
+        """Reescribe el CSV de la sucursal con su inventario actual."""
+        with self.candado:
+            todos_los_celulares = self.inventario.convertir_a_lista_python()
+            try:
+                with open(self.archivo, mode='w', newline='', encoding='utf-8') as file:
+                    writer = csv.writer(file)
+                    writer.writerow(CABECERA_CSV)
+                    for celular in todos_los_celulares:
+                        writer.writerow(celular.to_csv_row())
+                logging.info(f"Sucursal '{self.clave}' guardada en {self.archivo}")
+            except Exception as e:
+                logging.error(f"Error guardando sucursal '{self.clave}': {e}")
+
+    def _reindexar(self):
+        """Reconstruye el BST de precios a partir de la lista.
+
+        El BST no soporta borrado, así que tras vender o cambiar un precio se
+        reconstruye. Se insertan primero las medianas para que quede balanceado
+        aunque la lista venga ordenada (p. ej. después de Bubble Sort).
+        """
+        ordenados = sorted(self.inventario.convertir_a_lista_python(), key=lambda c: c.precio)
+        self.indice_precios = ArbolBinarioBusqueda()
+        pendientes = [(0, len(ordenados))]
+        while pendientes:
+            inicio, fin = pendientes.pop()
+            if inicio >= fin:
+                continue
+            medio = (inicio + fin) // 2
+            self.indice_precios.insertar(ordenados[medio])
+            pendientes.append((inicio, medio))
+            pendientes.append((medio + 1, fin))
+
+    def agregar(self, celular):
+        with self.candado:
+            celular.sucursal = self.clave
+            self.inventario.agregar_al_final(celular)
+            self.indice_precios.insertar(celular)
+            self._cambio()
+
+    def vender(self, id_celular):
+        with self.candado:
+            celular = self.inventario.eliminar_por_id(id_celular)
+            if celular:
+                celular.estado = "Vendido"
+                celular.reservado_hasta = None
+                self.historial_eliminados.push(celular)
+                self._reindexar()
+                self._cambio()
+            return celular
+
+    def actualizar(self, id_celular, cambios):
+        """Actualiza modelo, capacidad, condición y/o precio; reindexa si cambió el precio."""
+        with self.candado:
+            celular = self.inventario.buscar_por_id(id_celular)
+            if celular is None:
+                return None
+            # Convertir el precio antes de tocar el equipo: si falla no queda nada a medias
+            precio = float(cambios['precio']) if 'precio' in cambios else celular.precio
+            for campo in ('modelo', 'capacidad', 'condicion'):
+                if campo in cambios:
+                    setattr(celular, campo, cambios[campo])
+            if precio != celular.precio:
+                celular.precio = precio
+                self._reindexar()
+            self._cambio()
+            return celular
+
+    def cambiar_estado(self, id_celular, estado):
+        with self.candado:
+            celular = self.inventario.buscar_por_id(id_celular)
+            if celular:
+                celular.estado = estado
+                celular.reservado_hasta = None
+                self._cambio()
+            return celular
+
+    def deshacer_venta(self):
+        with self.candado:
+            celular = self.historial_eliminados.pop()
+            if celular:
+                celular.estado = "Disponible"
+                self.agregar(celular)
+            return celular
+
+    def buscar_por_id(self, id_celular):
+        with self.candado:
+            return self.inventario.buscar_por_id(id_celular)
+
+    def reservar(self, id_celular, vence_en):
+        """Aparta un equipo disponible (o extiende su reserva) hasta `vence_en`."""
+        with self.candado:
+            celular = self.inventario.buscar_por_id(id_celular)
+            if celular is None or celular.estado not in ESTADOS_EN_INVENTARIO:
+                return None
+            celular.estado = "Reservado"
+            celular.reservado_hasta = vence_en
+            self._cambio()
+            return celular
+
+    def liberar_reserva(self, id_celular, vencidas_a=None):
+        """Regresa un equipo reservado a Disponible.
+
+        Con `vencidas_a` solo se libera si la reserva ya venció en ese instante,
+        así un temporizador viejo no cancela una reserva que fue extendida.
+        """
+        with self.candado:
+            celular = self.inventario.buscar_por_id(id_celular)
+            if celular is None or celular.estado != "Reservado":
+                return None
+            if vencidas_a is not None and (celular.reservado_hasta or 0) > vencidas_a:
+                return None
+            celular.estado = "Disponible"
+            celular.reservado_hasta = None
+            self._cambio()
+            return celular
+
+    def reservados(self):
+        with self.candado:
+            return [c for c in self.inventario.convertir_a_lista_python() if c.estado == "Reservado"]
+
+    def buscar_por_rango_precio(self, min_precio, max_precio, texto=None):
+        """Rango de precio con el BST; texto filtra por modelo, capacidad o condición."""
+        with self.candado:
+            resultados = self.indice_precios.buscar_por_rango_precio(min_precio, max_precio)
+        if texto:
+            texto = texto.lower()
+            resultados = [
+                c for c in resultados
+                if texto in f"{c.modelo} {c.capacidad} {c.condicion}".lower()
+            ]
+        return resultados
+
+    def listar(self):
+        with self.candado:
+            return self.inventario.convertir_a_lista_python()
+
+    def ordenar_por_precio(self):
+        """Bubble Sort in-place sobre la lista de la sucursal."""
+        with self.candado:
+            bubble_sort_lista_doble(self.inventario)
+            return self.inventario.convertir_a_lista_python()
+
+    def vendidos(self):
+        with self.candado:
+            return self.historial_eliminados.a_lista()
+
+    def id_maximo(self):
+        with self.candado:
+            ids = [c.id for c in self.inventario.convertir_a_lista_python()]
+            ids.extend(c.id for c in self.historial_eliminados.a_lista())
+            return max(ids, default=0)
+
+
+class GestorSucursales:
+    """Reparte el inventario por clave de sucursal y agrega las consultas entre sucursales.
+
+    Las consultas globales recorren cada sucursal (bajo su propio candado) y
+    combinan los resultados parciales. No se usa un pool de hilos: los
+    recorridos son Python puro y por el GIL no correrían en paralelo. Lo que
+    abarata el panel global es que cada sucursal cachea sus agregados parciales,
+    así que solo se recalculan las sucursales que cambiaron.
+    """
+    def __init__(self, claves=None, ttl_reserva=TTL_RESERVA_SEGUNDOS):
+        self.sucursales = {}
+        self.ttl_reserva = ttl_reserva
+        # Contador global de IDs; el candado evita que dos altas obtengan el mismo
+        self.candado = threading.Lock()
+        self.ultimo_id = 0
+        # Una sola rueda para todas las sucursales; las claves son (sucursal, id)
+        self.reservas = RuedaTemporizadores()
+        for clave in claves or [SUCURSAL_PRINCIPAL]:
+            self.registrar(clave)
+
+    def registrar(self, clave):
+        if clave not in self.sucursales:
+            self.sucursales[clave] = Sucursal(clave)
+        return self.sucursales[clave]
+
+    def obtener(self, clave):
+        return self.sucursales.get(clave)
+
+    def claves(self):
+        return list(self.sucursales.keys())
+
+    def repartir(self, funcion, claves=None):
+        """Ejecuta funcion(sucursal) en cada sucursal seleccionada. Devuelve {clave: resultado}."""
+        seleccion = [self.sucursales[c] for c in (claves or self.sucursales) if c in self.sucursales]
+        return {sucursal.clave: funcion(sucursal) for sucursal in seleccion}
+
+    def cargar(self):
+        resultados = self.repartir(lambda s: s.cargar())
+        self._renumerar_duplicados()
+        self.programar_reservas()
+        return resultados
+
+    def _renumerar_duplicados(self):
+        """Asigna IDs nuevos a los equipos cuyo ID ya existe en otra sucursal.
+
+        Las sucursales que antes corrían como procesos separados numeran desde 1;
+        sin esto un mismo ID apuntaría a equipos de varias sucursales.
+        """
+        maximo = max(self.repartir(lambda s: s.id_maximo()).values(), default=0)
+        vistos = set()
+        for sucursal in self.sucursales.values():
+            renumerados = False
+            with sucursal.candado:
+                for celular in sucursal.listar():
+                    if celular.id in vistos:
+                        maximo += 1
+                        logging.warning(f"ID {celular.id} repetido en '{sucursal.clave}'; se reasigna como {maximo}.")
+                        celular.id = maximo
+                        renumerados = True
+                    vistos.add(celular.id)
+            if renumerados:
+                sucursal.guardar()
+        with self.candado:
+            self.ultimo_id = maximo
+
+    def asignar_id(self):
+        """Los IDs son globales para que un ID identifique al equipo sin importar la sucursal."""
+        with self.candado:
+            self.ultimo_id += 1
+            return self.ultimo_id
+
+    def programar_reservas(self):
+        """Vuelve a programar las reservas leídas del CSV (sobreviven reinicios)."""
+        ahora = time.time()
+        for sucursal in self.sucursales.values():
+            for celular in sucursal.reservados():
+                # Reservas hechas antes de existir el TTL (o con un vencimiento
+                # inválido en el CSV): cuentan desde ahora
+                if celular.reservado_hasta is None or not math.isfinite(celular.reservado_hasta):
+                    celular.reservado_hasta = ahora + self.ttl_reserva
+                self.reservas.programar((sucursal.clave, celular.id), celular.reservado_hasta)
+
+    def reservar(self, sucursal, id_celular, ttl=None):
+        vence_en = time.time() + (self.ttl_reserva if ttl is None else ttl)
+        if not math.isfinite(vence_en):
+            raise ValueError("El TTL de la reserva debe ser finito")
+        # Primero la rueda: si programar falla, el equipo no queda reservado sin temporizador
+        clave = (sucursal.clave, id_celular)
+        self.reservas.programar(clave, vence_en)
+        celular = sucursal.reservar(id_celular, vence_en)
+        if celular is None:
+            self.reservas.cancelar(clave)
+        return celular
+
+    def cancelar_reserva(self, sucursal, id_celular):
+        self.reservas.cancelar((sucursal.clave, id_celular))
+        return sucursal.liberar_reserva(id_celular)
+
+    def vender(self, sucursal, id_celular):
+        """Vende un equipo y cancela su temporizador de reserva, si tenía."""
+        celular = sucursal.vender(id_celular)
+        if celular:
+            self.reservas.cancelar((sucursal.clave, id_celular))
+        return celular
+
+    def expirar_reservas(self, ahora=None):
+        """Avanza la rueda y libera las reservas vencidas. Devuelve las sucursales afectadas."""
+        ahora = time.time() if ahora is None else ahora
+        afectadas = {}
+        for clave, id_celular in self.reservas.avanzar(ahora):
+            sucursal = self.sucursales.get(clave)
+            if sucursal is None:
+                continue
+            if sucursal.liberar_reserva(id_celular, vencidas_a=ahora):
+                logging.info(f"Reserva vencida: ID {id_celular} en '{clave}' vuelve a estar disponible.")
+                afectadas[clave] = sucursal
+                continue
+            # Si la reserva sigue vigente (p. ej. se extendió), se vuelve a programar
+            celular = sucursal.buscar_por_id(id_celular)
+            if celular and celular.estado == "Reservado" and celular.reservado_hasta:
+                self.reservas.programar((clave, id_celular), celular.reservado_hasta)
+        return list(afectadas.values())
+
+    def listar(self, claves=None):
+        parciales = self.repartir(lambda s: s.listar(), claves)
+        return [c for lista in parciales.values() for c in lista]
+
+    def buscar_por_id(self, id_celular, claves=None):
+        parciales = self.repartir(lambda s: s.buscar_por_id(id_celular), claves)
+        for clave, celular in parciales.items():
+            if celular:
+                return self.sucursales[clave], celular
+        return None, None
+
+    def buscar_por_rango_precio(self, min_precio, max_precio, texto=None, claves=None):
+        parciales = self.repartir(lambda s: s.buscar_por_rango_precio(min_precio, max_precio, texto), claves)
+        # Cada BST devuelve su rango ya ordenado por precio; solo hay que intercalar
+        return list(heapq.merge(*parciales.values(), key=lambda c: c.precio))
@@ -0,0 +1,28 @@
+from estructuras.rueda_temporizadores import RuedaTemporizadores
+
+
+def test_no_vence_antes_de_tiempo():
+    rueda = RuedaTemporizadores(ranuras=8, inicio=1000)
+    rueda.programar("a", 1010.9)
+    # Mismo segundo que el vencimiento, pero antes de él
+    assert rueda.avanzar(1010.2) == []
+    assert len(rueda) == 1
+    assert rueda.avanzar(1011.0) == ["a"]
+    assert len(rueda) == 0
+
+
+def test_vueltas_y_cancelacion():
+    rueda = RuedaTemporizadores(ranuras=4, inicio=0)
+    rueda.programar("cerca", 2)
+    rueda.programar("lejos", 6)  # Misma ranura que "cerca", una vuelta después
+    rueda.programar("cancelada", 3)
+    assert rueda.cancelar("cancelada")
+    assert rueda.avanzar(2) == ["cerca"]
+    assert rueda.avanzar(5) == []
+    assert rueda.avanzar(100) == ["lejos"]
+
+
+def test_vencimiento_pasado_se_atiende_en_el_siguiente_tick():
+    rueda = RuedaTemporizadores(ranuras=8, inicio=50)
+    rueda.programar("vieja", 10)
+    assert rueda.avanzar(51) == ["vieja"]
@@ -0,0 +1,194 @@
+from modelo import Celular
+from estadisticas import calcular_estadisticas
+from sucursales import CABECERA_CSV, GestorSucursales, Sucursal
+
+
+def _sucursal_con(*precios):
+    sucursal = Sucursal("prueba")
+    for i, precio in enumerate(precios, start=1):
+        sucursal.agregar(Celular(i, f"iPhone {i}", "128GB", "Nuevo", precio))
+    return sucursal
+
+
+def _gestor_con(**precios_por_sucursal):
+    gestor = GestorSucursales(list(precios_por_sucursal))
+    for clave, precios in precios_por_sucursal.items():
+        for precio in precios:
+            i = gestor.asignar_id()
+            gestor.obtener(clave).agregar(Celular(i, f"iPhone {i}", "128GB", "Nuevo", precio))
+    return gestor
+
+
+def test_venta_y_deshacer_mantienen_el_indice():
+    sucursal = _sucursal_con(8000, 9000, 10000)
+    sucursal.vender(2)
+    assert [c.id for c in sucursal.buscar_por_rango_precio(0, 20000)] == [1, 3]
+    sucursal.deshacer_venta()
+    assert [c.id for c in sucursal.buscar_por_rango_precio(0, 20000)] == [1, 2, 3]
+
+
+def test_cambio_de_precio_reindexa():
+    sucursal = _sucursal_con(8000, 9000, 10000)
+    sucursal.actualizar(1, {"precio": 12000})
+    assert [c.id for c in sucursal.buscar_por_rango_precio(0, 20000)] == [2, 3, 1]
+    assert sucursal.buscar_por_rango_precio(7000, 8500) == []
+
+
+def test_ids_repetidos_entre_sucursales_se_renumeran(tmp_path):
+    gestor = GestorSucursales(["centro", "norte"])
+    for sucursal in gestor.sucursales.values():
+        sucursal.archivo = str(tmp_path / f"{sucursal.clave}.csv")
+        sucursal.agregar(Celular(1, "iPhone 13", "128GB", "Nuevo", 11000))
+        sucursal.agregar(Celular(2, "iPhone 14", "256GB", "Nuevo", 14500))
+        sucursal.guardar()
+
+    gestor.cargar()
+    ids = [c.id for c in gestor.listar()]
+    assert sorted(ids) == [1, 2, 3, 4]
+    assert gestor.asignar_id() == 5
+    # La renumeración queda guardada en el CSV de la sucursal afectada
+    with open(gestor.obtener("norte").archivo, encoding="utf-8") as archivo:
+        assert archivo.readline().strip().split(",") == CABECERA_CSV
+        assert [linea.split(",")[0] for linea in archivo] == ["3", "4"]
+
+
+def test_resumen_se_recalcula_solo_tras_un_cambio():
+    sucursal = _sucursal_con(8000, 9000)
+    llamadas = []
+
+    def calcular(s):
+        llamadas.append(1)
+        return len(s.listar())
+
+    assert sucursal.resumen(calcular) == 2
+    assert sucursal.resumen(calcular) == 2
+    assert len(llamadas) == 1
+    sucursal.vender(1)
+    assert sucursal.resumen(calcular) == 1
+    assert len(llamadas) == 2
+
+
+def test_precio_invalido_no_deja_cambios_a_medias():
+    sucursal = _sucursal_con(8000)
+    try:
+        sucursal.actualizar(1, {"modelo": "iPhone 99", "precio": "caro"})
+    except ValueError:
+        pass
+    celular = sucursal.buscar_por_id(1)
+    assert (celular.modelo, celular.precio) == ("iPhone 1", 8000)
+
+
+def test_rango_de_precio_intercala_sucursales():
+    gestor = _gestor_con(centro=[8000, 12000, 20000], norte=[9000, 15000], sur=[10000])
+    resultados = gestor.buscar_por_rango_precio(8500, 16000)
+    assert [c.precio for c in resultados] == [9000, 10000, 12000, 15000]
+    assert [c.sucursal for c in resultados] == ["norte", "sur", "centro", "norte"]
+
+
+def test_filtro_por_sucursal():
+    gestor = _gestor_con(centro=[8000, 12000], norte=[9000], sur=[10000])
+    assert sorted(c.precio for c in gestor.listar(["centro", "sur"])) == [8000, 10000, 12000]
+    assert gestor.repartir(lambda s: s.inventario.tamano, ["norte"]) == {"norte": 1}
+    # Las claves desconocidas se ignoran; sin claves se consultan todas
+    assert gestor.repartir(lambda s: s.inventario.tamano, ["norte", "otra"]) == {"norte": 1}
+    assert len(gestor.listar()) == 4
+
+
+def test_estadisticas_combinan_sucursales():
+    gestor = _gestor_con(centro=[8000, 25000], norte=[12000], vacia=[])
+    gestor.vender(gestor.obtener("norte"), 3)
+    stats = calcular_estadisticas(gestor)
+
+    assert stats["inventory"]["total"] == 2
+    assert stats["inventory"]["value"] == 33000
+    # La sucursal vacía no debe arrastrar el mínimo a 0
+    assert stats["inventory"]["min_price"] == 8000
+    assert stats["inventory"]["max_price"] == 25000
+    assert [s["count"] for s in stats["inventory"]["price_segments"]] == [1, 0, 1, 0]
+    assert stats["sales"]["total"] == 1
+    assert stats["sales"]["revenue"] == 12000
+    assert stats["branches"]["vacia"]["total"] == 0
+
+    solo_norte = calcular_estadisticas(gestor, ["norte"])
+    assert solo_norte["inventory"]["total"] == 0
+    assert solo_norte["inventory"]["min_price"] == 0
+    assert list(solo_norte["branches"]) == ["norte"]
+
+
+def test_reserva_vence_y_vuelve_a_disponible():
+    gestor = _gestor_con(centro=[8000, 9000])
+    centro = gestor.obtener("centro")
+    celular = gestor.reservar(centro, 1, ttl=30)
+    assert celular.estado == "Reservado"
+
+    assert gestor.expirar_reservas(celular.reservado_hasta - 5) == []
+    assert centro.buscar_por_id(1).estado == "Reservado"
+    assert gestor.expirar_reservas(celular.reservado_hasta + 1) == [centro]
+    assert centro.buscar_por_id(1).estado == "Disponible"
+    assert centro.buscar_por_id(1).reservado_hasta is None
+    assert len(gestor.reservas) == 0
+
+
+def test_reserva_sobrevive_reinicio(tmp_path):
+    gestor = _gestor_con(centro=[8000, 9000])
+    centro = gestor.obtener("centro")
+    centro.archivo = str(tmp_path / "centro.csv")
+    vence_en = gestor.reservar(centro, 2, ttl=60).reservado_hasta
+    centro.guardar()
+
+    reiniciado = GestorSucursales(["centro"])
+    reiniciado.obtener("centro").archivo = centro.archivo
+    reiniciado.cargar()
+    celular = reiniciado.obtener("centro").buscar_por_id(2)
+    assert celular.estado == "Reservado"
+    assert celular.reservado_hasta == vence_en
+    assert len(reiniciado.reservas) == 1
+    assert reiniciado.expirar_reservas(vence_en + 1) == [reiniciado.obtener("centro")]
+    assert celular.estado == "Disponible"
+
+
+def test_csv_sin_columna_reservado_hasta(tmp_path):
+    archivo = tmp_path / "inventario.csv"
+    archivo.write_text(
+        "ID,Modelo,Capacidad,Condicion,Precio,Estado\n"
+        "1,iPhone 13,128GB,Nuevo,11000.0,Disponible\n"
+        "2,iPhone 14,256GB,Seminuevo,12000.0,Reservado\n"
+        "3,iPhone 15,128GB,Nuevo,16000.0,Vendido\n",
+        encoding="utf-8",
+    )
+    gestor = GestorSucursales(["principal"], ttl_reserva=600)
+    principal = gestor.obtener("principal")
+    principal.archivo = str(archivo)
+    gestor.cargar()
+
+    assert [c.id for c in principal.listar()] == [1, 2]
+    reservado = principal.buscar_por_id(2)
+    assert reservado.estado == "Reservado"
+    # Sin vencimiento guardado, la reserva cuenta el TTL desde la carga
+    assert reservado.reservado_hasta is not None
+    assert len(gestor.reservas) == 1
+
+
+def test_estadisticas_separan_disponibles_y_reservados():
+    gestor = _gestor_con(centro=[8000, 9000], norte=[10000])
+    gestor.reservar(gestor.obtener("centro"), 1)
+    gestor.reservar(gestor.obtener("norte"), 3)
+    stats = calcular_estadisticas(gestor)
+
+    assert stats["inventory"]["total"] == 3
+    assert stats["inventory"]["available"] == 1
+    assert stats["inventory"]["reserved"] == 2
+    assert stats["branches"]["centro"]["available"] == 1
+    assert stats["branches"]["norte"]["reserved"] == 1
+
+
+def test_ttl_no_finito_no_reserva():
+    gestor = _gestor_con(centro=[8000])
+    centro = gestor.obtener("centro")
+    for ttl in (float("nan"), float("inf")):
+        try:
+            gestor.reservar(centro, 1, ttl=ttl)
+        except ValueError:
+            pass
+        assert centro.buscar_por_id(1).estado == "Disponible"
+        assert len(gestor.reservas) == 0